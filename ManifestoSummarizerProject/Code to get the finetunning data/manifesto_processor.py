@@ -1,6 +1,20 @@
+import bisect
 import json
-import re
+import mmap
+import os
 import sys # Used to get command-line arguments
+from collections import deque
+from operator import itemgetter
+
+try:
+    import ijson # Optional: streams the OCR export page by page instead of loading it all at once
+except ImportError:
+    ijson = None
+
+try:
+    import orjson # Optional: faster serialization of the final JSON dataset
+except ImportError:
+    orjson = None
 
 # --- Configuration ---
 INPUT_OCR_FILE = "export.json" # Your OCR output
@@ -8,100 +22,246 @@ REASSEMBLED_TEXT_FILE = "01_reassembled_text.txt"
 CHUNKS_FOR_REVIEW_FILE = "02_chunks_for_editing_and_summarization.txt"
 SUMMARIES_INPUT_FILE = "03_summaries.txt" # File you will create manually
 FINAL_OUTPUT_JSON_FILE = "manifesto_fine_tuning_data.json"
+FINAL_OUTPUT_JSONL_FILE = "manifesto_fine_tuning_data.jsonl" # Used with the 'jsonl' option
+# Worker processes for page reassembly. Reassembling a page takes less time than sending it to
+# another process, so 1 (no worker processes) is fastest for typical exports; None uses all CPUs.
+REASSEMBLY_WORKERS = 1
 
 # --- Part 1: Text Reassembly Logic ---
-def reassemble_text_from_ocr_data(ocr_data):
+# Errors that can be raised while parsing the OCR export, with or without ijson
+OCR_JSON_ERRORS = (json.JSONDecodeError,) if ijson is None else (json.JSONDecodeError, ijson.JSONError)
+# Stray whitespace characters in OCR word text (tabs, non-breaking spaces, embedded line
+# breaks) that are replaced with plain spaces, so each reassembled line stays a single line
+OCR_WHITESPACE_TABLE = str.maketrans({'\t': ' ', '\xa0': ' ', '\r': ' ', '\n': ' '})
+
+def iter_ocr_pages(ocr_file):
+    """
+    Yields the entries of the OCR data's "page_data" list one page at a time.
+    If ijson is installed the file is parsed incrementally, so only the current page
+    is held in memory; otherwise the whole file is loaded with json.load.
+
+    Args:
+        ocr_file (file): The OCR output file, opened in binary mode.
+
+    Yields:
+        dict: The OCR data for a single page.
+    """
+    if ijson is None:
+        yield from json.load(ocr_file).get("page_data", [])
+    else:
+        yield from ijson.items(ocr_file, "page_data.item", use_float=True)
+
+def compute_line_starts(ymin_sorted, line_y_tolerance):
     """
-    Parses OCR data (as a Python dictionary from loaded JSON),
-    reassembles words into lines, and attempts basic paragraphing.
+    Groups words, sorted top to bottom, into lines. A word belongs to the current line
+    if its ymin is within the tolerance of the line's first word; the first word beyond
+    that starts the next line. This is still a Python loop, but it steps once per line
+    (not per word): as ymin only grows in sorted order, a binary search finds where each line ends.
 
     Args:
-        ocr_data (dict): The loaded JSON data from the OCR output.
+        ymin_sorted (list): The words' ymin values, in ascending order.
+        line_y_tolerance (float): How far below a line's first word a word may be and
+            still belong to that line.
 
     Returns:
-        str: The reassembled text from the document.
+        list of int: The index of the first word of each line.
     """
-    full_text_parts = []
-    page_data = ocr_data.get("page_data", [])
+    line_starts = []
+    line_start = 0
+    while line_start < len(ymin_sorted):
+        line_starts.append(line_start)
+        line_start = bisect.bisect_right(ymin_sorted, ymin_sorted[line_start] + line_y_tolerance, line_start)
+    return line_starts
 
-    for page_idx, page_info in enumerate(page_data):
-        page_number = page_info.get("page", page_idx) # Use index if 'page' key is not present
-        words = page_info.get("words", [])
-        
-        if not words:
-            full_text_parts.append(f"\n--- Page {page_number} (No words found) ---\n")
-            continue
-
-        # Sort words primarily by ymin (top to bottom), then by xmin (left to right)
-        # This is a common heuristic for standard document layouts.
-        words.sort(key=lambda w: (w.get('ymin', 0), w.get('xmin', 0)))
-
-        page_lines = []
-        if not words: # Should be redundant due to the check above, but good for safety
-            continue
-            
-        current_line_words = []
-        # Heuristic for line grouping:
-        # Tolerance for how much y-coordinate can vary for words on the same line.
-        # This value might need tuning based on your document's font size and line spacing.
-        line_y_tolerance = 15 # Example tolerance in pixels
-
-        if words: # Ensure there are words to process
-            current_line_ymin_ref = words[0].get('ymin', 0) # y-coordinate of the first word in the current potential line
-
-            for word_obj in words:
-                word_text = word_obj.get('text', '')
-                word_ymin = word_obj.get('ymin', 0)
-
-                # Check if the current word belongs to the current line
-                if not current_line_words or abs(word_ymin - current_line_ymin_ref) <= line_y_tolerance:
-                    current_line_words.append(word_obj)
-                else:
-                    # New line detected (significant y-coordinate change)
-                    # Sort words in the completed line by xmin before joining
-                    current_line_words.sort(key=lambda w: w.get('xmin', 0))
-                    page_lines.append(" ".join(w.get('text', '') for w in current_line_words))
-                    
-                    # Start a new line
-                    current_line_words = [word_obj]
-                    current_line_ymin_ref = word_obj.get('ymin', 0) # Update reference y for the new line
-            
-            # Add the last line being processed
-            if current_line_words:
-                current_line_words.sort(key=lambda w: w.get('xmin', 0))
-                page_lines.append(" ".join(w.get('text', '') for w in current_line_words))
-        
-        # Basic paragraphing: For now, simply join lines with a newline.
-        # More sophisticated paragraph detection would analyze vertical spacing between line bounding boxes.
-        # Manual review and adjustment of paragraphs in the output file is highly recommended.
-        page_content = "\n".join(page_lines)
-        full_text_parts.append(f"\n--- Page {page_number} ---\n{page_content}\n")
+def reassemble_page(page_info, page_idx):
+    """
+    Reassembles the words of a single OCR page into lines of text.
+
+    Args:
+        page_info (dict): The OCR data for one page (an entry of "page_data").
+        page_idx (int): Position of the page in the document, used if 'page' is missing.
+
+    Returns:
+        str: The page's text, including its '--- Page N ---' header.
+    """
+    page_number = page_info.get("page", page_idx) # Use index if 'page' key is not present
+    words = page_info.get("words", [])
+    # Words without any text (separators, empty boxes) add nothing to the output, so drop them before sorting
+    words = [w for w in words if w.get('text', '').strip()]
+
+    if not words:
+        return f"\n--- Page {page_number} (No words found) ---\n"
+
+    # Sort words primarily by ymin (top to bottom), then by xmin (left to right)
+    # This is a common heuristic for standard document layouts.
+    # Each word's text and coordinates are read from its dict exactly once: the texts into
+    # a list, the coordinates into (ymin, xmin, index) tuples. Sorting plain tuples needs no
+    # key function per word, and the index keeps words with equal coordinates in their
+    # original order and points back to the word's text.
+    texts = [w.get('text', '') for w in words]
+    sorted_words = sorted([(w.get('ymin', 0), w.get('xmin', 0), i) for i, w in enumerate(words)])
+
+    # Stray whitespace is rare, so one check over the whole page decides whether the
+    # word texts need cleaning at all
+    page_text = "".join(texts)
+    if page_text.translate(OCR_WHITESPACE_TABLE) != page_text:
+        texts = [text.translate(OCR_WHITESPACE_TABLE) for text in texts]
+
+    # Heuristic for line grouping:
+    # Tolerance for how much y-coordinate can vary for words on the same line.
+    # This value might need tuning based on your document's font size and line spacing.
+    line_y_tolerance = 15 # Example tolerance in pixels
+
+    line_starts = compute_line_starts([ymin for ymin, _, _ in sorted_words], line_y_tolerance)
+    line_bounds = line_starts + [len(sorted_words)]
+
+    page_lines = []
+    for line_start, line_end in zip(line_bounds, line_bounds[1:]):
+        # Sort words in the line by xmin before joining (stable, so ties keep their order)
+        line_words = sorted(sorted_words[line_start:line_end], key=itemgetter(1))
+        page_lines.append(" ".join([texts[i] for _, _, i in line_words]))
 
-    return "".join(full_text_parts)
+    # Basic paragraphing: For now, simply join lines with a newline.
+    # More sophisticated paragraph detection would analyze vertical spacing between line bounding boxes.
+    # Manual review and adjustment of paragraphs in the output file is highly recommended.
+    page_content = "\n".join(page_lines)
+    return f"\n--- Page {page_number} ---\n{page_content}\n"
+
+def reassemble_text_from_ocr_data(pages, max_workers=1):
+    """
+    Reassembles OCR pages into text one page at a time, so the whole document never has
+    to be held in memory. Nothing is written here: the caller decides where each page's
+    text goes (e.g. a file, create_initial_chunks, or both).
+
+    Args:
+        pages (iterable of dict): The OCR pages, e.g. ocr_data["page_data"] or iter_ocr_pages(f).
+        max_workers (int, optional): Number of worker processes used to reassemble pages
+            in parallel. Defaults to 1, which keeps all work in this process; None uses
+            every CPU available to this process.
+
+    Yields:
+        str: The reassembled text of each page, in order.
+    """
+    if max_workers is None:
+        max_workers = _available_cpu_count()
+
+    if max_workers > 1:
+        yield from _reassemble_pages_in_parallel(pages, max_workers)
+    else:
+        for page_idx, page_info in enumerate(pages):
+            yield reassemble_page(page_info, page_idx)
+
+def _available_cpu_count():
+    """
+    Returns the number of CPUs this process may run on (which can be fewer than the
+    machine has, e.g. in a container), falling back to os.cpu_count().
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def _reassemble_page_batch(indexed_pages):
+    """
+    Reassembles a batch of (page_idx, page_info) pairs in a worker process.
+    """
+    return [reassemble_page(page_info, page_idx) for page_idx, page_info in indexed_pages]
+
+def _reassemble_pages_in_parallel(pages, max_workers, pages_per_task=8):
+    """
+    Reassembles pages in a pool of worker processes and yields their text in page order.
+    Pages are sent to the workers in batches of pages_per_task to spread the per-task
+    overhead, and only a couple of batches per worker are submitted ahead of the one being
+    yielded, so a streamed document is never read into memory all at once (as executor.map would do).
+    """
+    # Imported here because loading multiprocessing noticeably slows down every run of the
+    # script, while only opted-in parallel runs use it
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque()
+        batch = []
+        for indexed_page in enumerate(pages):
+            batch.append(indexed_page)
+            if len(batch) == pages_per_task:
+                in_flight.append(executor.submit(_reassemble_page_batch, batch))
+                batch = []
+                if len(in_flight) >= 2 * max_workers:
+                    yield from in_flight.popleft().result()
+        if batch:
+            in_flight.append(executor.submit(_reassemble_page_batch, batch))
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+def iter_paragraphs(text_parts):
+    """
+    Yields paragraphs (text separated by blank lines) from a stream of text pieces,
+    such as reassembled pages or the lines of an open text file, as soon as each
+    paragraph boundary is seen.
+
+    Args:
+        text_parts (iterable of str): Consecutive pieces of the reassembled text.
+
+    Yields:
+        str: Each non-empty paragraph, stripped of leading/trailing whitespace.
+    """
+    paragraph_lines = []
+    pending = "" # Unfinished last line of the previous piece
+    for part in text_parts:
+        lines = (pending + part).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            # A blank (or whitespace-only) line ends the current paragraph
+            if line.strip():
+                paragraph_lines.append(line)
+            elif paragraph_lines:
+                yield "\n".join(paragraph_lines).strip()
+                paragraph_lines = []
+    if pending.strip():
+        paragraph_lines.append(pending)
+    if paragraph_lines:
+        yield "\n".join(paragraph_lines).strip()
 
-def create_initial_chunks(full_text, output_chunk_file):
+def iter_text_file_lines(text_file_path):
     """
-    Splits the full reassembled text into initial chunks based on multiple newline characters
+    Yields the lines of a UTF-8 text file (such as an edited copy of the reassembled
+    text) through a read-only memory map, so the file is paged in by the OS as it is
+    scanned instead of being read into memory as one string.
+
+    Args:
+        text_file_path (str): Path to the text file.
+
+    Yields:
+        str: Each line of the file, with Windows line endings converted to '\\n'.
+    """
+    with open(text_file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0: # An empty file cannot be memory-mapped
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b""):
+                yield line.decode('utf-8').replace('\r\n', '\n')
+
+def create_initial_chunks(text_parts, output_chunk_file):
+    """
+    Splits the reassembled text into initial chunks based on multiple newline characters
     (indicative of paragraph breaks) and saves them in a numbered format for review.
 
     Args:
-        full_text (str): The complete reassembled text of the document.
+        text_parts (iterable of str): The reassembled text, e.g. one piece per page
+            or an open file of previously reassembled text.
         output_chunk_file (str): Path to the file where initial chunks will be saved.
 
     Returns:
         int: The number of initial chunks created.
     """
-    # Split by two or more consecutive newline characters (common paragraph separator)
-    # Then, filter out any empty strings that might result from multiple splits or leading/trailing newlines.
-    # Also, strip leading/trailing whitespace from each potential chunk.
-    potential_chunks = [chunk.strip() for chunk in re.split(r'\n\s*\n+', full_text) if chunk.strip()]
-    
-    with open(output_chunk_file, 'w', encoding='utf-8') as f:
-        for i, chunk_text in enumerate(potential_chunks):
-            f.write(f"--- CHUNK {i+1} ---\n")
-            f.write(chunk_text + "\n") # Ensure a newline after the chunk text itself
-            f.write(f"--- END CHUNK {i+1} ---\n\n") # Double newline to separate chunk blocks
-    return len(potential_chunks)
+    num_chunks = 0
+    # Each chunk block is formatted in one go and written with a single call into a large
+    # buffer, so the file is flushed in big blocks rather than several small writes per chunk.
+    with open(output_chunk_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        for i, chunk_text in enumerate(iter_paragraphs(text_parts)):
+            # A newline follows the chunk text itself, and a double newline separates chunk blocks
+            f.write(f"--- CHUNK {i+1} ---\n{chunk_text}\n--- END CHUNK {i+1} ---\n\n")
+            num_chunks += 1
+    return num_chunks
 
 # --- Part 2: Final JSON Creation Logic ---
 def create_final_json(edited_chunks_file, summaries_file, output_json_file):
@@ -113,15 +273,13 @@ def create_final_json(edited_chunks_file, summaries_file, output_json_file):
         edited_chunks_file (str): Path to the file containing manually edited text chunks.
         summaries_file (str): Path to the file containing one summary per line, corresponding to each chunk.
         output_json_file (str): Path where the final JSON dataset will be saved.
+            If it ends in '.jsonl', the records are written one per line (JSON Lines) instead.
     """
-    chunks = []
+    # Only count the chunk headers at first: a wrong number of chunks or summaries is then
+    # reported after a quick scan of both files, before any chunk text is parsed.
     try:
         with open(edited_chunks_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-            # Regex to find chunks based on the defined delimiters
-            # re.DOTALL allows '.' to match newline characters as well
-            raw_chunks = re.findall(r"--- CHUNK \d+ ---\n(.*?)\n--- END CHUNK \d+ ---", content, re.DOTALL)
-            chunks = [chunk.strip() for chunk in raw_chunks] # Strip whitespace from each extracted chunk
+            num_chunk_headers = sum(1 for line in f if line.startswith("--- CHUNK "))
     except FileNotFoundError:
         print(f"Error: Edited chunks file not found: '{edited_chunks_file}'")
         return
@@ -135,7 +293,7 @@ def create_final_json(edited_chunks_file, summaries_file, output_json_file):
         print(f"Error: Summaries file not found: '{summaries_file}'")
         return
 
-    if not chunks:
+    if not num_chunk_headers:
         print(f"Error: No chunks found in '{edited_chunks_file}'. Please check the file and delimiters.")
         return
         
@@ -143,12 +301,71 @@ def create_final_json(edited_chunks_file, summaries_file, output_json_file):
         print(f"Error: No summaries found in '{summaries_file}'. Please ensure it contains one summary per line.")
         return
 
-    if len(chunks) != len(summaries):
-        print(f"Error: Mismatch between the number of chunks ({len(chunks)}) and summaries ({len(summaries)}).")
+    if num_chunk_headers != len(summaries):
+        print(f"Error: Mismatch between the number of chunks ({num_chunk_headers}) and summaries ({len(summaries)}).")
         print(f"Please ensure each chunk in '{edited_chunks_file}' has a corresponding summary line in '{summaries_file}'.")
         return
 
-    final_dataset_records = []
+    chunks = []
+    with open(edited_chunks_file, 'r', encoding='utf-8') as f:
+        # Read the file line by line, collecting the lines between each pair of
+        # '--- CHUNK X ---' / '--- END CHUNK X ---' delimiters, so only the chunk
+        # currently being read is held in memory. An unterminated chunk is ignored.
+        body = None # Lines of the chunk being read, or None when between chunks
+        for line in f:
+            if line.startswith("--- CHUNK "):
+                body = []
+            elif line.startswith("--- END CHUNK "):
+                if body is not None:
+                    chunks.append("".join(body).strip()) # Strip whitespace from each extracted chunk
+                body = None
+            elif body is not None:
+                body.append(line)
+
+    if len(chunks) != num_chunk_headers:
+        print(f"Error: Only {len(chunks)} of the {num_chunk_headers} chunks in '{edited_chunks_file}' are complete.")
+        print("Please ensure every '--- CHUNK X ---' marker is followed by its '--- END CHUNK X ---' marker.")
+        return
+
+    records = iter_training_records(chunks, summaries)
+    try:
+        if output_json_file.endswith(".jsonl"):
+            # Write one record per line as each record is built, without collecting them first
+            num_records = 0
+            with open(output_json_file, "wb") as f:
+                for record in records:
+                    f.write(_dumps_record(record))
+                    f.write(b"\n")
+                    num_records += 1
+        else:
+            # The number of records is known up front, so the list is allocated once and filled in place
+            final_dataset_records = [None] * len(chunks)
+            for i, record in enumerate(records):
+                final_dataset_records[i] = record
+            num_records = len(final_dataset_records)
+            # Save the list of records as a JSON array, pretty-printed with an indent of 2
+            if orjson is not None:
+                with open(output_json_file, "wb") as f:
+                    f.write(orjson.dumps(final_dataset_records, option=orjson.OPT_INDENT_2))
+            else:
+                with open(output_json_file, "w", encoding="utf-8") as f:
+                    json.dump(final_dataset_records, f, indent=2, ensure_ascii=False)
+        print(f"\nSuccessfully created fine-tuning data at: '{output_json_file}'")
+        print(f"Total records created: {num_records}")
+    except IOError:
+        print(f"\nError: Could not write fine-tuning data to '{output_json_file}'")
+
+def iter_training_records(chunks, summaries):
+    """
+    Pairs each chunk with its summary and yields the corresponding training records.
+
+    Args:
+        chunks (list of str): The edited text chunks.
+        summaries (list of str): The summary for each chunk, in the same order.
+
+    Yields:
+        dict: A record in the chat "messages" format expected by the SFTTrainer.
+    """
     # Define the system prompt that will be part of each training example
     system_prompt = "You are an AI assistant that provides concise and neutral summaries of election manifesto sections. Focus on key policies and promises."
 
@@ -160,70 +377,118 @@ def create_final_json(edited_chunks_file, summaries_file, output_json_file):
         user_content = f"Please summarize the following section from the election manifesto:\n\n{chunk_text}"
 
         # Create the record in the format expected by the SFTTrainer
-        record = {
+        yield {
             "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_content},
                 {"role": "model", "content": summary_text} # This is the target output for the model to learn
             ]
         }
-        final_dataset_records.append(record)
 
-    try:
-        with open(output_json_file, "w", encoding="utf-8") as f:
-            # Save the list of records as a JSON array, pretty-printed with an indent of 2
-            json.dump(final_dataset_records, f, indent=2, ensure_ascii=False)
-        print(f"\nSuccessfully created fine-tuning data at: '{output_json_file}'")
-        print(f"Total records created: {len(final_dataset_records)}")
-    except IOError:
-        print(f"\nError: Could not write fine-tuning data to '{output_json_file}'")
+def _dumps_record(record):
+    """
+    Serializes a single record to compact UTF-8 JSON, using orjson when it is available.
+    """
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
 
 
 # --- Main Script Logic ---
+def _write_through(text_parts, out_fh):
+    """
+    Writes each piece of text to out_fh as it is passed on to the consumer, so the
+    reassembled text file is filled while the chunker reads the same pages.
+    """
+    for text_part in text_parts:
+        out_fh.write(text_part)
+        yield text_part
+
 def main():
     """
     Main function to orchestrate the processing pipeline.
     It checks for a command-line argument to switch between modes:
     1. Initial processing: OCR to reassembled text and initial chunks.
-    2. Final formatting: Edited chunks and summaries to final JSON.
+    2. Final formatting: Edited chunks and summaries to final JSON
+       (or JSON Lines, with an extra 'jsonl' argument).
+    3. Re-chunking ('rechunk'): Hand-edited reassembled text to new initial chunks.
     """
     # Check if a command-line argument 'process_summaries' is provided
     if len(sys.argv) > 1 and sys.argv[1].lower() == "process_summaries":
         print("--- Mode: Processing Summaries and Creating Final JSON ---")
-        create_final_json(CHUNKS_FOR_REVIEW_FILE, SUMMARIES_INPUT_FILE, FINAL_OUTPUT_JSON_FILE)
+        # An optional 'jsonl' argument writes the dataset as JSON Lines, one record per line
+        if len(sys.argv) > 2 and sys.argv[2].lower() == "jsonl":
+            output_file = FINAL_OUTPUT_JSONL_FILE
+        else:
+            output_file = FINAL_OUTPUT_JSON_FILE
+        create_final_json(CHUNKS_FOR_REVIEW_FILE, SUMMARIES_INPUT_FILE, output_file)
+    elif len(sys.argv) > 1 and sys.argv[1].lower() == "rechunk":
+        # The initial processing pipes the reassembled text straight into the chunker; this mode
+        # re-reads the reassembled text file instead, e.g. after cleaning it up by hand.
+        print("--- Mode: Re-creating Chunks from the Reassembled Text ---")
+        if not os.path.isfile(REASSEMBLED_TEXT_FILE):
+            print(f"Error: Reassembled text file not found at '{REASSEMBLED_TEXT_FILE}'. Run the initial processing first.")
+            return
+        print(f"Creating initial chunks from '{REASSEMBLED_TEXT_FILE}' in '{CHUNKS_FOR_REVIEW_FILE}'...")
+        # As in the initial processing, the chunks are written to a temporary file that only
+        # replaces the existing (possibly hand-edited) chunks file once the whole text was read.
+        chunks_tmp_file = CHUNKS_FOR_REVIEW_FILE + ".tmp"
+        try:
+            num_chunks = create_initial_chunks(iter_text_file_lines(REASSEMBLED_TEXT_FILE), chunks_tmp_file)
+            os.replace(chunks_tmp_file, CHUNKS_FOR_REVIEW_FILE)
+        except UnicodeDecodeError:
+            print(f"   Error: Could not decode '{REASSEMBLED_TEXT_FILE}'. Ensure it is saved as UTF-8 text.")
+            return
+        except IOError:
+            print(f"   Error: Could not write initial chunks to '{CHUNKS_FOR_REVIEW_FILE}'.")
+            return
+        finally:
+            # A leftover temporary file (only present if something failed) is removed
+            if os.path.exists(chunks_tmp_file):
+                os.remove(chunks_tmp_file)
+        print(f"   ... Created {num_chunks} initial chunks.")
+        print(f"   Continue with the manual review of '{CHUNKS_FOR_REVIEW_FILE}' and '{SUMMARIES_INPUT_FILE}' as before.")
     else:
         print("--- Mode: Initial OCR Processing and Chunk Creation ---")
         try:
-            with open(INPUT_OCR_FILE, 'r', encoding='utf-8') as f:
-                ocr_data = json.load(f)
+            ocr_file = open(INPUT_OCR_FILE, 'rb')
         except FileNotFoundError:
             print(f"Error: Input OCR file not found at '{INPUT_OCR_FILE}'.")
             print("Please make sure it's in the same directory as the script, or update the INPUT_OCR_FILE path.")
             return
-        except json.JSONDecodeError:
-            print(f"Error: Could not decode JSON from '{INPUT_OCR_FILE}'. Ensure it's a valid JSON file.")
-            return
 
+        # Pages are reassembled one at a time: each page is written to the reassembled text file
+        # and passed straight on to the chunker, so the whole document is never held in memory.
+        # Both outputs are written to temporary files next to them and only replace the real
+        # files once the whole OCR file has been processed, so an invalid or truncated OCR file
+        # cannot wipe out previously edited chunks.
         print(f"Step 1: Reassembling text from '{INPUT_OCR_FILE}'...")
-        reassembled_text = reassemble_text_from_ocr_data(ocr_data)
-        
-        try:
-            with open(REASSEMBLED_TEXT_FILE, 'w', encoding='utf-8') as f:
-                f.write(reassembled_text)
-            print(f"   ... Full reassembled text saved to '{REASSEMBLED_TEXT_FILE}'.")
-            print("      (For your reference and detailed manual cleaning if the initial reassembly needs refinement).")
-        except IOError:
-            print(f"   Error: Could not write reassembled text to '{REASSEMBLED_TEXT_FILE}'.")
-
+        print(f"Step 2: Creating initial chunks for your review in '{CHUNKS_FOR_REVIEW_FILE}'...")
+        reassembled_tmp_file = REASSEMBLED_TEXT_FILE + ".tmp"
+        chunks_tmp_file = CHUNKS_FOR_REVIEW_FILE + ".tmp"
+        with ocr_file:
+            try:
+                with open(reassembled_tmp_file, 'w', encoding='utf-8') as text_file:
+                    page_texts = reassemble_text_from_ocr_data(iter_ocr_pages(ocr_file), REASSEMBLY_WORKERS)
+                    num_chunks = create_initial_chunks(_write_through(page_texts, text_file), chunks_tmp_file)
+                os.replace(reassembled_tmp_file, REASSEMBLED_TEXT_FILE)
+                os.replace(chunks_tmp_file, CHUNKS_FOR_REVIEW_FILE)
+            except OCR_JSON_ERRORS:
+                print(f"Error: Could not decode JSON from '{INPUT_OCR_FILE}'. Ensure it's a valid JSON file.")
+                return
+            except IOError:
+                print(f"   Error: Could not write reassembled text to '{REASSEMBLED_TEXT_FILE}' or initial chunks to '{CHUNKS_FOR_REVIEW_FILE}'.")
+                return # Stop if we can't create these crucial files
+            finally:
+                # Leftover temporary files (only present if something failed) are removed
+                for tmp_file in (reassembled_tmp_file, chunks_tmp_file):
+                    if os.path.exists(tmp_file):
+                        os.remove(tmp_file)
 
-        print(f"\nStep 2: Creating initial chunks for your review in '{CHUNKS_FOR_REVIEW_FILE}'...")
-        try:
-            num_chunks = create_initial_chunks(reassembled_text, CHUNKS_FOR_REVIEW_FILE)
-            print(f"   ... Created {num_chunks} initial chunks.")
-            print("      (These chunks are based on paragraph-like breaks from the reassembled text).")
-        except IOError:
-            print(f"   Error: Could not write initial chunks to '{CHUNKS_FOR_REVIEW_FILE}'.")
-            return # Stop if we can't create this crucial file
+        print(f"   ... Full reassembled text saved to '{REASSEMBLED_TEXT_FILE}'.")
+        print("      (For your reference and detailed manual cleaning if the initial reassembly needs refinement).")
+        print(f"   ... Created {num_chunks} initial chunks.")
+        print("      (These chunks are based on paragraph-like breaks from the reassembled text).")
 
         # Instructions for the user's manual steps
         print("\n--- MANUAL ACTION REQUIRED ---")
@@ -248,6 +513,7 @@ def main():
         print(f"   AND written all corresponding summaries in '{SUMMARIES_INPUT_FILE}':")
         print(f"   Re-run this script with the 'process_summaries' argument to generate the final JSON dataset.")
         print(f"   Example command: python {sys.argv[0]} process_summaries")
+        print(f"   (Use 'python {sys.argv[0]} process_summaries jsonl' to write '{FINAL_OUTPUT_JSONL_FILE}', one record per line.)")
         print("---------------------------------")
 
 if __name__ == "__main__":